@@ -3,13 +3,21 @@ Configuration management for AI Tutor application
 """
 
 import os
-from typing import Optional
+from functools import cached_property, lru_cache
+from typing import List, Optional
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
-    """Application settings loaded from environment variables."""
+    """Application settings loaded from environment variables.
+
+    Settings are read-only after startup, so the model is frozen: assignment
+    validation is disabled and accidental mutation raises instead of
+    silently diverging between workers.
+    """
+
+    model_config = SettingsConfigDict(frozen=True, extra="ignore", env_file_encoding="utf-8", case_sensitive=True)
 
     # API Configuration
     API_TITLE: str = "AI Tutor API"
@@ -38,26 +46,48 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "uploads"
     CHROMA_DB_PATH: str = "chroma_db"
 
+    # Memory Configuration
+    MEMORY_MAX_MESSAGES: int = 32
+    MEMORY_MAX_SESSIONS: int = 1024
+    MEMORY_SESSION_TTL_SECONDS: int = 3600
+
     # Search Configuration
     SEARCH_MAX_RESULTS: int = 10
 
+    # CORS Configuration
+    # Override with an explicit origin list in production so browsers can
+    # cache preflight responses
+    CORS_ORIGINS: List[str] = ["*"]
+
     # Server Configuration
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = False
     LOG_LEVEL: str = "INFO"
 
-    # Render/Production Configuration
-    @property
+    @cached_property
     def port(self) -> int:
-        """Get port from environment or default."""
-        return int(os.getenv("PORT", self.PORT))
+        """Server port; lowercase alias of PORT computed once per instance."""
+        return self.PORT
+
+
+def _env_file() -> Optional[str]:
+    """Return the dotenv file to load, or None to skip dotenv parsing.
+
+    On platforms that inject environment variables directly (Docker, Render),
+    parsing .env is pure startup overhead, so it is opt-in: set USE_DOTENV=1
+    locally (and optionally ENV_FILE to point at a non-default file).
+    """
+    if os.getenv("USE_DOTENV") == "1":
+        return os.getenv("ENV_FILE", ".env")
+    return None
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = True
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the cached settings instance, creating it on first use.
 
-# Global settings instance
-settings = Settings()
+    Settings construction (env parsing + Pydantic validation) only happens
+    on the first call instead of at import time.
+    """
+    return Settings(_env_file=_env_file())
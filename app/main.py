@@ -2,20 +2,25 @@
 FastAPI application entry point
 """
 
+import asyncio
+import hashlib
 import logging
 import os
-import shutil
+import time
 import uuid
 from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile, status
+import aiofiles
+import orjson
+from fastapi import FastAPI, File, Form, HTTPException, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
-from app.config import settings
+from app.config import get_settings
 from app.models.schemas import (
     ChatRequest,
     ChatResponse,
@@ -24,42 +29,121 @@ from app.models.schemas import (
     DocumentSummaryRequest,
     DocumentSummaryResponse,
     DocumentUploadResponse,
-    ErrorResponse,
     HealthResponse,
     LearnRequest,
     LearnResponse,
 )
-from app.services.agent_service import agent_service
-from app.services.llm_service import llm_service
-from app.services.rag_service import rag_service
+settings = get_settings()
 
-# Configure logging
-logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
+def _configure_logging() -> None:
+    """Configure root logging from settings; unknown levels fall back to INFO."""
+    level = logging.getLevelNamesMapping().get(settings.LOG_LEVEL, logging.INFO)
+    logging.basicConfig(level=level, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+# Learn-mode prompt templates, built once at import time and formatted per
+# request with the difficulty and topic.
+LEARN_PROMPTS = {
+    "quiz": """Generate a {difficulty} difficulty quiz question about: {topic}
+
+Format:
+1. Question
+2. Multiple choice options (A, B, C, D)
+3. Correct answer
+4. Explanation
+
+Make it educational and clear.""",
+    "practice": """Create a {difficulty} difficulty practice problem about: {topic}
+
+Include:
+1. Problem statement
+2. Step-by-step solution
+3. Key concepts explained
+4. Similar practice suggestions""",
+    "explain": """Provide a detailed, educational explanation about: {topic}
+
+Make it:
+- Clear and easy to understand
+- Include examples if helpful
+- Break down complex concepts
+- Use analogies when appropriate
+- Suitable for {difficulty} level learners""",
+}
+
+
+# Service accessors: the service modules transitively import the ML stack
+# (langchain, chromadb, sentence-transformers), so they are imported lazily
+# on first use instead of at module import time.
+def get_agent_service():
+    """Import and return the shared agent service on first use."""
+    from app.services.agent_service import get_agent_service as factory
+
+    return factory()
+
+
+def get_llm_service():
+    """Import and return the shared LLM service on first use."""
+    from app.services.llm_service import get_llm_service as factory
+
+    return factory()
+
+
+def get_rag_service():
+    """Import and return the shared RAG service on first use."""
+    from app.services.rag_service import get_rag_service as factory
+
+    return factory()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown events."""
     # Startup
+    _configure_logging()
     logger.info("Starting AI Tutor API...")
-    logger.info(f"RAG Available: {rag_service.is_available()}")
-    logger.info(f"Model: {llm_service.model_name}")
+    upload_dir = Path(settings.UPLOAD_DIR)
+    upload_dir.mkdir(exist_ok=True)
+    app.state.upload_dir = upload_dir
+
+    # Warm the service singletons off the event loop so startup returns
+    # immediately and the first request does not pay for model loading;
+    # a warmup failure is logged and construction retried lazily on use.
+    def _warm_services():
+        try:
+            agent = get_agent_service()
+            logger.info(f"RAG Available: {get_rag_service().is_available()}")
+            logger.info(f"Model: {agent.get_status()['model_name']}")
+        except Exception as e:
+            logger.warning(f"Service warmup failed: {e}")
+
+    warmup = asyncio.create_task(asyncio.to_thread(_warm_services))
     yield
+    if not warmup.done():
+        warmup.cancel()
     # Shutdown
     logger.info("Shutting down AI Tutor API...")
 
 
 # Create FastAPI app
-app = FastAPI(title=settings.API_TITLE, version=settings.API_VERSION, description=settings.API_DESCRIPTION, lifespan=lifespan)
+app = FastAPI(
+    title=settings.API_TITLE,
+    version=settings.API_VERSION,
+    description=settings.API_DESCRIPTION,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
-# CORS middleware
+# CORS middleware; max_age lets browsers cache preflight responses for 24h
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
+    allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,
 )
 
 # Serve frontend static files
@@ -69,10 +153,18 @@ try:
         # Mount static files (CSS, JS) at /static
         app.mount("/static", StaticFiles(directory=str(frontend_path)), name="static")
 
+        # Cache the SPA shell once at startup: no per-request disk I/O or stat
+        _index_bytes = (frontend_path / "index.html").read_bytes()
+        _index_etag = hashlib.md5(_index_bytes).hexdigest()
+
         @app.get("/")
         async def serve_frontend():
-            """Serve the frontend HTML file."""
-            return FileResponse(str(frontend_path / "index.html"))
+            """Serve the cached frontend HTML file."""
+            return Response(
+                content=_index_bytes,
+                media_type="text/html",
+                headers={"ETag": _index_etag, "Cache-Control": "public, max-age=300"},
+            )
 
         logger.info(f"Frontend files served from: {frontend_path}")
     else:
@@ -94,10 +186,25 @@ except Exception as e:
         return {"message": "AI Tutor API", "version": settings.API_VERSION, "docs": "/docs"}
 
 
+# Liveness probes hit /health every few seconds; cache the agent status for
+# a short TTL so probe storms don't repeatedly walk service state.
+_STATUS_TTL_SECONDS = 2.0
+_status_cache = {"t": 0.0, "v": None}
+
+
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
     """Health check endpoint."""
-    status_info = agent_service.get_status()
+    if os.getenv("SKIP_RAG_PROBE") == "1":
+        # Report liveness without touching the agent/vector-store stack;
+        # used by tests and by deployments that only need a liveness ping
+        status_info = {"rag_available": False, "tools_count": 0, "model_name": settings.OPENROUTER_MODEL}
+    else:
+        now = time.monotonic()
+        if _status_cache["v"] is None or now - _status_cache["t"] >= _STATUS_TTL_SECONDS:
+            _status_cache["v"] = get_agent_service().get_status()
+            _status_cache["t"] = now
+        status_info = _status_cache["v"]
     return HealthResponse(
         status="healthy",
         version=settings.API_VERSION,
@@ -107,7 +214,29 @@ async def health_check():
     )
 
 
-@app.post("/chat", response_model=ChatResponse, tags=["Chat"])
+async def _do_chat(request: ChatRequest, default_use_document: Optional[bool], metadata: Optional[dict] = None) -> ChatResponse:
+    """Shared chat pipeline for /chat and /learn/ask.
+
+    Applies default_use_document when the request leaves use_document unset.
+    """
+    # Generate session ID if not provided
+    session_id = request.session_id or uuid.uuid4().hex
+    use_document = request.use_document if request.use_document is not None else default_use_document
+
+    # Process chat in a worker thread (LLM/tool calls are blocking)
+    result = await run_in_threadpool(
+        get_agent_service().chat, message=request.message, session_id=session_id, use_document=use_document
+    )
+
+    return ChatResponse(
+        response=result.get("output", ""),
+        session_id=session_id,
+        source=result.get("source", "general"),
+        metadata={"session_id": session_id, **(metadata or {})},
+    )
+
+
+@app.post("/chat", response_model=ChatResponse, response_model_exclude_none=True, tags=["Chat"])
 async def chat(request: ChatRequest):
     """
     Chat endpoint for interacting with the AI tutor.
@@ -117,35 +246,76 @@ async def chat(request: ChatRequest):
     - **use_document**: Optional flag to force document search (if available)
     """
     try:
-        # Generate session ID if not provided
-        session_id = request.session_id or str(uuid.uuid4())
-
-        # Process chat
-        result = agent_service.chat(message=request.message, session_id=session_id, use_document=request.use_document)
-
-        return ChatResponse(
-            response=result.get("output", ""),
-            session_id=session_id,
-            source=result.get("source", "general"),
-            metadata={"session_id": session_id},
-        )
+        return await _do_chat(request, default_use_document=None)
 
     except Exception as e:
         logger.error(f"Chat error: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error processing chat: {str(e)}")
 
 
+@app.post("/chat/stream", tags=["Chat"])
+async def chat_stream(request: ChatRequest):
+    """
+    Stream the chat response as server-sent events.
+
+    Emits 'data:' lines with JSON deltas while the LLM generates, so clients
+    see the first tokens after one model round-trip instead of waiting for
+    the full completion.
+    """
+    session_id = request.session_id or uuid.uuid4().hex
+    agent = get_agent_service()
+
+    def event_stream():
+        for chunk in agent.stream_chat(message=request.message, session_id=session_id, use_document=request.use_document):
+            yield b"data: " + orjson.dumps({"delta": chunk, "session_id": session_id}) + b"\n\n"
+        yield b"data: [DONE]\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.delete("/chat/{session_id}", tags=["Chat"])
 async def clear_session(session_id: str):
     """Clear conversation memory for a specific session."""
     try:
-        agent_service.clear_session(session_id)
+        get_agent_service().clear_session(session_id)
         return {"message": f"Session {session_id} cleared successfully"}
     except Exception as e:
         logger.error(f"Error clearing session: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error clearing session: {str(e)}")
 
 
+def _is_pdf(file: UploadFile) -> bool:
+    """Check whether an upload is a PDF via content type or case-insensitive suffix."""
+    return file.content_type == "application/pdf" or (file.filename or "").lower().endswith(".pdf")
+
+
+async def _save_upload_file(file: UploadFile, file_path: Path) -> None:
+    """Stream an uploaded file to disk in chunks without blocking the event loop.
+
+    Enforces settings.MAX_UPLOAD_SIZE while writing and removes the partial
+    file before raising 413 when the limit is exceeded.
+    """
+    bytes_written = 0
+    try:
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while chunk := await file.read(1 << 20):
+                bytes_written += len(chunk)
+                if bytes_written > settings.MAX_UPLOAD_SIZE:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"File exceeds maximum upload size of {settings.MAX_UPLOAD_SIZE} bytes",
+                    )
+                await buffer.write(chunk)
+    except HTTPException:
+        if file_path.exists():
+            file_path.unlink()
+        raise
+
+
 @app.post("/document/upload", response_model=DocumentUploadResponse, tags=["Document"])
 async def upload_document(file: UploadFile = File(...)):
     """
@@ -154,30 +324,28 @@ async def upload_document(file: UploadFile = File(...)):
     - **file**: PDF file to upload
     """
     # Validate file type
-    if not file.filename.endswith(".pdf"):
+    if not _is_pdf(file):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only PDF files are supported")
 
     try:
-        # Create uploads directory if it doesn't exist
-        upload_dir = Path("uploads")
-        upload_dir.mkdir(exist_ok=True)
+        # Upload directory is created once at startup
+        upload_dir = app.state.upload_dir
 
         # Generate unique filename
-        document_id = str(uuid.uuid4())
+        document_id = uuid.uuid4().hex
         file_path = upload_dir / f"{document_id}_{file.filename}"
 
         # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await _save_upload_file(file, file_path)
 
         logger.info(f"File uploaded: {file_path}")
 
-        # Load document into RAG service
-        result = rag_service.load_document_from_path(str(file_path))
+        # Load document into RAG service in a worker thread (PDF parse + embeddings)
+        result = await run_in_threadpool(get_rag_service().load_document_from_path, str(file_path))
 
         if result["success"]:
             # Reload agent tools to include new document
-            agent_service.reload_tools()
+            get_agent_service().reload_tools()
 
             return DocumentUploadResponse(
                 message="Document uploaded and processed successfully",
@@ -197,6 +365,8 @@ async def upload_document(file: UploadFile = File(...)):
                 detail=f"Failed to process document: {result.get('error', 'Unknown error')}",
             )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading document: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error uploading document: {str(e)}")
@@ -205,7 +375,7 @@ async def upload_document(file: UploadFile = File(...)):
 @app.get("/document/info", tags=["Document"])
 async def get_document_info():
     """Get information about the currently loaded document."""
-    info = rag_service.get_document_info()
+    info = get_rag_service().get_document_info()
     if not info.get("available"):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No document loaded")
     return info
@@ -232,28 +402,29 @@ async def process_document_and_summary(
     pages_loaded = None
     chunks_created = None
 
+    rag_service = get_rag_service()
+    agent_service = get_agent_service()
+
     try:
         # Process file upload if provided
         if file is not None:
-            if not file.filename.endswith(".pdf"):
+            if not _is_pdf(file):
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only PDF files are supported")
 
-            # Create uploads directory if it doesn't exist
-            upload_dir = Path("uploads")
-            upload_dir.mkdir(exist_ok=True)
+            # Upload directory is created once at startup
+            upload_dir = app.state.upload_dir
 
             # Generate unique filename
-            document_id = str(uuid.uuid4())
+            document_id = uuid.uuid4().hex
             file_path = upload_dir / f"{document_id}_{file.filename}"
 
             # Save file
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+            await _save_upload_file(file, file_path)
 
             logger.info(f"File uploaded: {file_path}")
 
-            # Load document into RAG service
-            result = rag_service.load_document_from_path(str(file_path))
+            # Load document into RAG service in a worker thread (PDF parse + embeddings)
+            result = await run_in_threadpool(rag_service.load_document_from_path, str(file_path))
 
             if not result["success"]:
                 if file_path.exists():
@@ -276,8 +447,8 @@ async def process_document_and_summary(
                     status_code=status.HTTP_400_BAD_REQUEST, detail="Text content must be at least 10 characters"
                 )
 
-            document_id = str(uuid.uuid4())
-            result = rag_service.load_document_from_text(text, source_name or f"text_{document_id}")
+            document_id = uuid.uuid4().hex
+            result = await run_in_threadpool(rag_service.load_document_from_text, text, source_name or f"text_{document_id}")
 
             if not result["success"]:
                 raise HTTPException(
@@ -300,7 +471,7 @@ async def process_document_and_summary(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Document processed but RAG service is not available"
             )
 
-        summary = rag_service.get_document_summary(llm_service.llm, query)
+        summary = await run_in_threadpool(rag_service.get_document_summary, get_llm_service().llm, query)
 
         return DocumentSummaryResponse(
             summary=summary,
@@ -325,6 +496,9 @@ async def query_document(request: DocumentQueryRequest):
     The AI will reference the uploaded documents and provide clear,
     educational explanations based on the document content.
     """
+    rag_service = get_rag_service()
+    agent_service = get_agent_service()
+
     if not rag_service.is_available():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -332,18 +506,19 @@ async def query_document(request: DocumentQueryRequest):
         )
 
     try:
-        session_id = request.session_id or str(uuid.uuid4())
+        session_id = request.session_id or uuid.uuid4().hex
 
-        # Query with teaching mode
-        response_text = rag_service.query_with_context(
-            query=request.query, llm=llm_service.llm, teaching_mode=request.teaching_mode
+        # Query with teaching mode in a worker thread (retrieval + LLM call)
+        response_text = await run_in_threadpool(
+            rag_service.query_with_context, query=request.query, llm=get_llm_service().llm, teaching_mode=request.teaching_mode
         )
 
         # Get number of relevant chunks (approximate)
         try:
-            docs = rag_service._retrieve_documents(request.query)
+            docs = await run_in_threadpool(rag_service._retrieve_documents, request.query)
             relevant_chunks = len(docs)
-        except:
+        except Exception as e:
+            logger.debug("Chunk-count retrieval failed: %s", e)
             relevant_chunks = None
 
         # Save to memory for context
@@ -374,41 +549,14 @@ async def learn(request: LearnRequest):
     - **practice**: Practice problems and solutions
     """
     try:
-        session_id = request.session_id or str(uuid.uuid4())
-
-        # Build learning prompt based on mode
-        if request.learning_mode == "quiz":
-            prompt = f"""Generate a {request.difficulty} difficulty quiz question about: {request.topic or request.question}
-
-Format:
-1. Question
-2. Multiple choice options (A, B, C, D)
-3. Correct answer
-4. Explanation
+        session_id = request.session_id or uuid.uuid4().hex
 
-Make it educational and clear."""
+        # Build learning prompt based on mode (defaults to explain)
+        template = LEARN_PROMPTS.get(request.learning_mode or "explain", LEARN_PROMPTS["explain"])
+        prompt = template.format(difficulty=request.difficulty, topic=request.topic or request.question)
 
-        elif request.learning_mode == "practice":
-            prompt = f"""Create a {request.difficulty} difficulty practice problem about: {request.topic or request.question}
-
-Include:
-1. Problem statement
-2. Step-by-step solution
-3. Key concepts explained
-4. Similar practice suggestions"""
-
-        else:  # explain mode
-            prompt = f"""Provide a detailed, educational explanation about: {request.topic or request.question}
-
-Make it:
-- Clear and easy to understand
-- Include examples if helpful
-- Break down complex concepts
-- Use analogies when appropriate
-- Suitable for {request.difficulty} level learners"""
-
-        # Use agent to get response
-        result = agent_service.chat(message=prompt, session_id=session_id, use_document=True)  # Prefer document if available
+        # Use agent to get response (prefer document if available)
+        result = await run_in_threadpool(get_agent_service().chat, message=prompt, session_id=session_id, use_document=True)
 
         return LearnResponse(
             response=result.get("output", ""),
@@ -428,28 +576,14 @@ Make it:
         )
 
 
-@app.post("/learn/ask", response_model=ChatResponse, tags=["Learn"])
+@app.post("/learn/ask", response_model=ChatResponse, response_model_exclude_none=True, tags=["Learn"])
 async def ask_question(request: ChatRequest):
     """
     Ask a question about the uploaded document or general knowledge.
     This is an alias for /chat with document preference.
     """
     try:
-        session_id = request.session_id or str(uuid.uuid4())
-
-        # Process chat with document preference
-        result = agent_service.chat(
-            message=request.message,
-            session_id=session_id,
-            use_document=request.use_document if request.use_document is not None else True,
-        )
-
-        return ChatResponse(
-            response=result.get("output", ""),
-            session_id=session_id,
-            source=result.get("source", "general"),
-            metadata={"session_id": session_id, "learning_mode": "ask"},
-        )
+        return await _do_chat(request, default_use_document=True, metadata={"learning_mode": "ask"})
 
     except Exception as e:
         logger.error(f"Ask error: {e}", exc_info=True)
@@ -460,14 +594,17 @@ async def ask_question(request: ChatRequest):
 async def global_exception_handler(request, exc):
     """Global exception handler."""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return ErrorResponse(error="Internal server error", detail=str(exc), status_code=500)
+    return ORJSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"error": "Internal server error", "detail": str(exc), "status_code": 500},
+    )
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    # Use PORT from environment (for Render, Heroku, etc.) or default
-    port = int(os.getenv("PORT", settings.PORT))
+    # PORT is an env-sourced settings field (Render, Heroku, etc. set it)
+    port = settings.PORT
     host = os.getenv("HOST", "0.0.0.0")
     
     # Disable reload in production (Render doesn't need it)
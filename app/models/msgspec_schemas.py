@@ -0,0 +1,63 @@
+"""
+msgspec-based schemas for hot request/response types
+
+These mirror the Pydantic models in schemas.py for the highest-QPS payloads
+(/chat and /health). msgspec.Struct decode+validate is several times faster
+than Pydantic and allocates less, so handlers that need to shave per-request
+validation cost can decode the raw body with decode_chat_request() and return
+encode_json() wrapped in a plain Response instead of relying on the default
+Pydantic path. The default routes keep their Pydantic models (and the
+OpenAPI schema they generate); this module is an opt-in fast path.
+"""
+
+from typing import Any, Dict, Optional
+
+try:
+    import msgspec
+except ImportError:
+    raise ImportError("msgspec not found. Install with: pip install msgspec")
+
+
+class ChatRequestMsg(msgspec.Struct):
+    """msgspec mirror of schemas.ChatRequest"""
+
+    message: str
+    session_id: Optional[str] = None
+    use_document: Optional[bool] = None
+
+
+class ChatResponseMsg(msgspec.Struct):
+    """msgspec mirror of schemas.ChatResponse"""
+
+    response: str
+    session_id: str
+    source: str
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class HealthResponseMsg(msgspec.Struct):
+    """msgspec mirror of schemas.HealthResponse"""
+
+    status: str
+    version: str
+    rag_available: bool
+    tools_count: int
+    model_name: str
+
+
+_chat_request_decoder = msgspec.json.Decoder(ChatRequestMsg)
+_json_encoder = msgspec.json.Encoder()
+
+
+def decode_chat_request(body: bytes) -> ChatRequestMsg:
+    """Decode and validate a raw /chat request body.
+
+    Raises msgspec.ValidationError on malformed or mistyped payloads; callers
+    should translate that into a 422 response.
+    """
+    return _chat_request_decoder.decode(body)
+
+
+def encode_json(struct: msgspec.Struct) -> bytes:
+    """Encode a msgspec struct to a JSON response body."""
+    return _json_encoder.encode(struct)
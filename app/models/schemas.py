@@ -4,7 +4,7 @@ Pydantic schemas for request/response validation
 
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ChatRequest(BaseModel):
@@ -14,10 +14,11 @@ class ChatRequest(BaseModel):
     session_id: Optional[str] = Field(None, description="Session ID for conversation context")
     use_document: Optional[bool] = Field(None, description="Force use document search (if available)")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {"message": "What is the capital of France?", "session_id": "user-123", "use_document": False}
         }
+    )
 
 
 class ChatResponse(BaseModel):
@@ -28,8 +29,8 @@ class ChatResponse(BaseModel):
     source: str = Field(..., description="Source of information: 'document', 'web', or 'general'")
     metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "response": "Paris is the capital of France.",
                 "session_id": "user-123",
@@ -37,6 +38,7 @@ class ChatResponse(BaseModel):
                 "metadata": {"tokens_used": 150},
             }
         }
+    )
 
 
 class DocumentUploadResponse(BaseModel):
@@ -3,32 +3,60 @@ Agent service that orchestrates LLM, RAG, and Search
 """
 
 import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
+from langchain_core.messages import HumanMessage
 from langchain_core.runnables import RunnableLambda
 
-from app.config import settings
-from app.services.llm_service import llm_service
+from app.config import get_settings
+from app.services.llm_service import get_llm_service
 from app.services.memory import SimpleMemory
-from app.services.rag_service import rag_service
-from app.services.search_service import search_service
+from app.services.rag_service import get_rag_service
+from app.services.search_service import get_search_service
+
+settings = get_settings()
 
 logger = logging.getLogger(__name__)
 
+# Queries matching these terms are auto-routed to document search first
+_DOC_KEYWORDS_RE = re.compile(r"\b(?:document|pdf|note|lecture|slide|chapter)s?\b", re.IGNORECASE)
+
+# Tutor prompt skeleton, built once at import time and formatted per turn
+_PROMPT_TEMPLATE = """You are a helpful AI tutor and research assistant.
+
+Previous conversation:
+{history}
+
+Current query: {query}
+
+Relevant information:
+{context}
+
+Based on the information above, provide a clear, helpful answer. If the information doesn't fully answer the question, say so and provide what you can."""
+
 
 class AgentService:
     """Service for managing the AI agent."""
 
     def __init__(self):
         """Initialize agent service."""
-        self.memory = SimpleMemory()
+        self.memory = SimpleMemory(
+            max_messages=settings.MEMORY_MAX_MESSAGES,
+            max_sessions=settings.MEMORY_MAX_SESSIONS,
+            session_ttl_seconds=settings.MEMORY_SESSION_TTL_SECONDS,
+        )
         self._initialize_tools()
+        # Worker pool for dispatching I/O-bound tool calls concurrently
+        self._executor = ThreadPoolExecutor(max_workers=4)
         self.agent = RunnableLambda(self._agent_executor)
         logger.info(f"Agent initialized with {len(self.tools)} tools")
 
     def _initialize_tools(self):
         """Initialize tools (can be called to reload after document upload)."""
-        self.retriever_tool = rag_service.get_retriever_tool()
-        self.search_tool = search_service.get_tool()
+        self.retriever_tool = get_rag_service().get_retriever_tool()
+        self.search_tool = get_search_service().get_tool()
 
         # Prepare tools list (only add non-None tools)
         self.tools = []
@@ -42,62 +70,70 @@ class AgentService:
         self._initialize_tools()
         logger.info("Tools reloaded")
 
+    def _build_context(self, query: str, use_document) -> tuple:
+        """Dispatch the selected tools and return (context, source)."""
+        # Select tools: an explicit use_document pins a single source; in auto
+        # mode every available tool is dispatched concurrently and the results
+        # are merged, with the auto-detected preference listed first.
+        tool_calls = []
+        if use_document is None:
+            # Auto-detect: if query mentions document-related terms, prefer document search
+            prefers_document = self.retriever_tool is not None and _DOC_KEYWORDS_RE.search(query) is not None
+            if self.retriever_tool is not None:
+                tool_calls.append(("document", "Document Information", self.retriever_tool))
+            if self.search_tool is not None:
+                tool_calls.append(("web", "Web Search Results", self.search_tool))
+            if not prefers_document:
+                tool_calls.reverse()
+        elif use_document and self.retriever_tool is not None:
+            tool_calls.append(("document", "Document Information", self.retriever_tool))
+        elif self.search_tool is not None:
+            tool_calls.append(("web", "Web Search Results", self.search_tool))
+
+        if not tool_calls:
+            # No tools available
+            context = "No search tools are currently available. Please upload a document or configure web search.\n\n"
+            source = "general"
+        else:
+            # Dispatch all selected tools in parallel; each is I/O-bound, so
+            # wall-clock latency is max(tool latencies) instead of their sum.
+            futures = [(src, header, self._executor.submit(tool.invoke, query)) for src, header, tool in tool_calls]
+            context_parts = []
+            sources = []
+            for src, header, future in futures:
+                try:
+                    tool_result = future.result(timeout=settings.OPENROUTER_TIMEOUT)
+                    context_parts.append(f"{header}:\n{tool_result}\n\n")
+                    sources.append(src)
+                except Exception as e:
+                    logger.error(f"Tool invocation failed: {e}")
+                    context_parts.append(f"Error retrieving information: {str(e)}\n\n")
+                    sources.append("error")
+            context = "".join(context_parts)
+            source = "+".join(dict.fromkeys(sources))
+
+        return context, source
+
+    def _build_prompt(self, query: str, chat_history: list, context: str) -> str:
+        """Render the tutor prompt from the query, recent history and context."""
+        # Last 4 messages for context
+        history_text = "\n".join(
+            f"{'Human' if isinstance(msg, HumanMessage) else 'Assistant'}: {msg.content}" for msg in chat_history[-4:]
+        )
+        return _PROMPT_TEMPLATE.format(history=history_text, query=query, context=context)
+
     def _agent_executor(self, input_dict: dict) -> dict:
         """Simple agent that routes to appropriate tool."""
         query = input_dict.get("input", "")
         chat_history = input_dict.get("chat_history", [])
         use_document = input_dict.get("use_document", None)
 
-        # Build context from chat history
-        history_text = ""
-        if chat_history:
-            for msg in chat_history[-4:]:  # Last 4 messages for context
-                if hasattr(msg, "content"):
-                    role = "Human" if msg.__class__.__name__ == "HumanMessage" else "Assistant"
-                    history_text += f"{role}: {msg.content}\n"
-
-        # Determine which tool to use
-        if use_document is None:
-            # Auto-detect: if query mentions document-related terms, use document search
-            use_document = self.retriever_tool is not None and (
-                "document" in query.lower() or "pdf" in query.lower() or "note" in query.lower() or "lecture" in query.lower()
-            )
-
-        source = "document" if use_document else "web"
-
-        # Get response from appropriate tool
-        try:
-            if use_document and self.retriever_tool:
-                tool_result = self.retriever_tool.invoke(query)
-                context = f"Document Information:\n{tool_result}\n\n"
-            elif self.search_tool is not None:
-                tool_result = self.search_tool.invoke(query)
-                context = f"Web Search Results:\n{tool_result}\n\n"
-            else:
-                # No tools available
-                context = "No search tools are currently available. Please upload a document or configure web search.\n\n"
-                source = "general"
-        except Exception as e:
-            logger.error(f"Tool invocation failed: {e}")
-            context = f"Error retrieving information: {str(e)}\n\n"
-            source = "error"
-
-        # Create prompt with context
-        full_prompt = f"""You are a helpful AI tutor and research assistant.
-
-Previous conversation:
-{history_text}
-
-Current query: {query}
-
-Relevant information:
-{context}
-
-Based on the information above, provide a clear, helpful answer. If the information doesn't fully answer the question, say so and provide what you can."""
+        context, source = self._build_context(query, use_document)
+        full_prompt = self._build_prompt(query, chat_history, context)
 
         # Get LLM response
         try:
-            response = llm_service.invoke(full_prompt)
+            response = get_llm_service().invoke(full_prompt)
             return {"output": response.content, "source": source}
         except Exception as e:
             logger.error(f"LLM invocation failed: {e}")
@@ -117,6 +153,32 @@ Based on the information above, provide a clear, helpful answer. If the informat
 
         return response
 
+    def stream_chat(self, message: str, session_id: str, use_document: bool = None):
+        """Stream a chat response chunk-by-chunk.
+
+        Yields text deltas as the LLM produces them so callers can forward
+        them to the client immediately; the accumulated response is saved to
+        memory once the stream finishes.
+        """
+        chat_history = self.memory.get_messages(session_id)
+        context, _ = self._build_context(message, use_document)
+        full_prompt = self._build_prompt(message, chat_history, context)
+
+        self.memory.add_user_message(session_id, message)
+        pieces = []
+        try:
+            for chunk in get_llm_service().stream(full_prompt):
+                text = chunk.content
+                if text:
+                    pieces.append(text)
+                    yield text
+        except Exception as e:
+            logger.error(f"LLM streaming failed: {e}")
+            error_text = f"I apologize, but I encountered an error: {str(e)}"
+            pieces.append(error_text)
+            yield error_text
+        self.memory.add_ai_message(session_id, "".join(pieces))
+
     def clear_session(self, session_id: str):
         """Clear conversation memory for a session."""
         self.memory.clear_session(session_id)
@@ -124,11 +186,13 @@ Based on the information above, provide a clear, helpful answer. If the informat
     def get_status(self) -> dict:
         """Get agent status."""
         return {
-            "rag_available": rag_service.is_available(),
+            "rag_available": get_rag_service().is_available(),
             "tools_count": len(self.tools),
-            "model_name": llm_service.model_name,
+            "model_name": get_llm_service().model_name,
         }
 
 
-# Global agent service instance
-agent_service = AgentService()
+@lru_cache(maxsize=1)
+def get_agent_service() -> AgentService:
+    """Return the shared agent service, creating it on first use."""
+    return AgentService()
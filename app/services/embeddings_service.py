@@ -2,29 +2,34 @@
 Embeddings service for document processing
 """
 
+import importlib.util
 import logging
+from functools import lru_cache
 
-from app.config import settings
+from app.config import get_settings
+
+settings = get_settings()
 
 logger = logging.getLogger(__name__)
 
-# Try to use new langchain-huggingface package, fallback to deprecated one
-try:
+# Prefer the new langchain-huggingface package, falling back to the
+# deprecated langchain-community class; find_spec probes availability
+# without paying for a failed package import
+if importlib.util.find_spec("langchain_huggingface") is not None:
     from langchain_huggingface import HuggingFaceEmbeddings
 
     logger.info("Using langchain-huggingface package")
-except ImportError:
-    try:
-        from langchain_community.embeddings import HuggingFaceEmbeddings
+elif importlib.util.find_spec("langchain_community") is not None:
+    from langchain_community.embeddings import HuggingFaceEmbeddings
 
-        logger.warning(
-            "Using deprecated HuggingFaceEmbeddings. Install langchain-huggingface for better support: pip install langchain-huggingface"
-        )
-    except ImportError:
-        raise ImportError(
-            "HuggingFaceEmbeddings not found. Install with: "
-            "pip install langchain-huggingface or pip install langchain-community"
-        )
+    logger.warning(
+        "Using deprecated HuggingFaceEmbeddings. Install langchain-huggingface for better support: pip install langchain-huggingface"
+    )
+else:
+    raise ImportError(
+        "HuggingFaceEmbeddings not found. Install with: "
+        "pip install langchain-huggingface or pip install langchain-community"
+    )
 
 
 class EmbeddingsService:
@@ -33,8 +38,16 @@ class EmbeddingsService:
     def __init__(self):
         """Initialize embeddings service."""
         try:
+            model_kwargs = {"device": settings.EMBEDDING_DEVICE}
+            if settings.EMBEDDING_DEVICE != "cpu":
+                # Half precision halves memory traffic on GPU with no
+                # measurable quality loss for sentence embeddings; CPU
+                # kernels lack fp16 support, so keep fp32 there
+                model_kwargs["model_kwargs"] = {"torch_dtype": "float16"}
             self.embeddings = HuggingFaceEmbeddings(
-                model_name=settings.EMBEDDING_MODEL, model_kwargs={"device": settings.EMBEDDING_DEVICE}
+                model_name=settings.EMBEDDING_MODEL,
+                model_kwargs=model_kwargs,
+                encode_kwargs={"batch_size": 64, "normalize_embeddings": True},
             )
             logger.info(f"Embeddings initialized: {settings.EMBEDDING_MODEL}")
         except Exception as e:
@@ -46,5 +59,7 @@ class EmbeddingsService:
         return self.embeddings
 
 
-# Global embeddings service instance
-embeddings_service = EmbeddingsService()
+@lru_cache(maxsize=1)
+def get_embeddings_service() -> EmbeddingsService:
+    """Return the shared embeddings service, creating it on first use."""
+    return EmbeddingsService()
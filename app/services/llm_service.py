@@ -2,14 +2,28 @@
 LLM service for OpenAI/OpenRouter integration
 """
 
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 
+import numpy as np
 from langchain_openai import ChatOpenAI
 
-from app.config import settings
+from app.config import get_settings
+
+settings = get_settings()
 
 logger = logging.getLogger(__name__)
 
+# Response cache bounds: remote LLM calls dominate latency and cost, so
+# repeated tutor questions are served from cache instead.
+CACHE_MAX_ENTRIES = 1000
+CACHE_TTL_SECONDS = 2 * 60 * 60
+SEMANTIC_SIMILARITY_THRESHOLD = 0.95
+
 
 class LLMService:
     """Service for managing LLM interactions."""
@@ -36,6 +50,17 @@ class LLMService:
             )
             logger.info(f"LLM initialized: {settings.OPENROUTER_MODEL}")
             logger.debug("API key loaded from environment (not hardcoded)")
+
+            # Two-tier response cache: exact tier keyed by prompt digest,
+            # semantic tier keyed by prompt embedding. The semantic tier
+            # keeps its unit-norm embeddings as rows of one float32 matrix
+            # so a lookup is a single BLAS matrix-vector product; row i of
+            # the matrix pairs with entry i of the (timestamp, response)
+            # list. Entries carry an insertion timestamp for TTL expiry.
+            self._cache_lock = threading.Lock()
+            self._exact_cache = OrderedDict()
+            self._semantic_matrix = None
+            self._semantic_meta = []
         except ValueError as e:
             logger.error(f"Configuration error: {e}")
             raise
@@ -43,20 +68,119 @@ class LLMService:
             logger.error(f"Failed to initialize LLM: {e}")
             raise
 
+    def _embed_prompt(self, prompt: str):
+        """Embed a prompt for the semantic cache, or None if unavailable."""
+        try:
+            from app.services.embeddings_service import get_embeddings_service
+
+            return get_embeddings_service().get_embeddings().embed_query(prompt)
+        except Exception as e:
+            logger.debug(f"Semantic cache embedding unavailable: {e}")
+            return None
+
+    def _exact_lookup(self, key: bytes, now: float):
+        """Look up a response by exact prompt digest, honoring TTL."""
+        with self._cache_lock:
+            entry = self._exact_cache.get(key)
+            if entry is None:
+                return None
+            timestamp, response = entry
+            if now - timestamp >= CACHE_TTL_SECONDS:
+                del self._exact_cache[key]
+                return None
+            self._exact_cache.move_to_end(key)
+            return response
+
+    def _semantic_lookup(self, embedding, now: float):
+        """Find a cached response whose prompt embedding is close enough.
+
+        Cached rows are unit-norm, so one matrix-vector product yields all
+        cosine similarities at once; only the few rows above the threshold
+        are then checked against the TTL in Python.
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        query_norm = float(np.linalg.norm(query))
+        if query_norm == 0.0:
+            return None
+        query /= query_norm
+        best_response = None
+        best_similarity = SEMANTIC_SIMILARITY_THRESHOLD
+        with self._cache_lock:
+            if self._semantic_matrix is None:
+                return None
+            similarities = self._semantic_matrix @ query
+            for index in np.flatnonzero(similarities >= SEMANTIC_SIMILARITY_THRESHOLD):
+                timestamp, response = self._semantic_meta[index]
+                if now - timestamp >= CACHE_TTL_SECONDS:
+                    continue
+                if similarities[index] >= best_similarity:
+                    best_similarity = float(similarities[index])
+                    best_response = response
+        return best_response
+
+    def _cache_store(self, key: bytes, embedding, response, now: float):
+        """Insert a response into both cache tiers, evicting old entries."""
+        with self._cache_lock:
+            self._exact_cache[key] = (now, response)
+            self._exact_cache.move_to_end(key)
+            while len(self._exact_cache) > CACHE_MAX_ENTRIES:
+                self._exact_cache.popitem(last=False)
+            if embedding is not None:
+                vector = np.asarray(embedding, dtype=np.float32)
+                vector_norm = float(np.linalg.norm(vector))
+                if vector_norm != 0.0:
+                    row = (vector / vector_norm)[np.newaxis, :]
+                    if self._semantic_matrix is None:
+                        self._semantic_matrix = row
+                    else:
+                        self._semantic_matrix = np.vstack((self._semantic_matrix, row))
+                    self._semantic_meta.append((now, response))
+                    if len(self._semantic_meta) > CACHE_MAX_ENTRIES:
+                        self._semantic_matrix = self._semantic_matrix[1:]
+                        del self._semantic_meta[0]
+
     def invoke(self, prompt: str):
-        """Invoke LLM with a prompt."""
+        """Invoke LLM with a prompt, serving repeats from the response cache."""
+        key = hashlib.sha256(prompt.encode()).digest()
+        now = time.monotonic()
+
+        response = self._exact_lookup(key, now)
+        if response is not None:
+            logger.debug("LLM response served from exact cache")
+            return response
+
+        embedding = self._embed_prompt(prompt)
+        if embedding is not None:
+            response = self._semantic_lookup(embedding, now)
+            if response is not None:
+                logger.debug("LLM response served from semantic cache")
+                return response
+
         try:
             response = self.llm.invoke(prompt)
-            return response
         except Exception as e:
             logger.error(f"LLM invocation failed: {e}")
             raise
 
+        self._cache_store(key, embedding, response, now)
+        return response
+
+    def stream(self, prompt: str):
+        """Stream LLM output chunks for a prompt (bypasses the response cache)."""
+        try:
+            for chunk in self.llm.stream(prompt):
+                yield chunk
+        except Exception as e:
+            logger.error(f"LLM streaming failed: {e}")
+            raise
+
     @property
     def model_name(self) -> str:
         """Get the model name."""
         return settings.OPENROUTER_MODEL
 
 
-# Global LLM service instance
-llm_service = LLMService()
+@lru_cache(maxsize=1)
+def get_llm_service() -> LLMService:
+    """Return the shared LLM service, creating it on first use."""
+    return LLMService()
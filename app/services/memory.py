@@ -3,50 +3,187 @@ Memory management for conversation context
 """
 
 import logging
-from typing import Dict, List, Optional
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 
 logger = logging.getLogger(__name__)
 
 
-class SimpleMemory:
-    """Simple conversation memory that stores messages per session."""
+class Msg(NamedTuple):
+    """Internal message record: a fixed-slot tuple instead of a validated
+    pydantic message, converted to LangChain messages only when read."""
+
+    role: str
+    content: str
+
+# Number of lock stripes guarding the session store; a power of two so the
+# bucket index reduces to a bitmask
+STRIPE_COUNT = 16
+
+
+class _Stripe:
+    """One shard of the session store with its own lock.
+
+    Tracks per-session last-activity timestamps so idle sessions can be
+    evicted; all access must go through the stripe lock.
+    """
+
+    __slots__ = ("lock", "sessions", "last_seen", "versions", "slice_cache")
 
     def __init__(self):
-        """Initialize memory storage."""
-        self.sessions: Dict[str, List[BaseMessage]] = {}
+        self.lock = threading.RLock()
+        self.sessions: Dict[str, Deque[Msg]] = {}
+        self.last_seen: Dict[str, float] = {}
+        # Write counter per session plus (session, last_n) -> (version,
+        # result) memo, so repeated reads between writes reuse one list
+        self.versions: Dict[str, int] = {}
+        self.slice_cache: Dict[Tuple[str, Optional[int]], Tuple[int, List[BaseMessage]]] = {}
+
+    def bump(self, session_id: str):
+        """Record a write to a session; callers must hold the lock."""
+        self.versions[session_id] = self.versions.get(session_id, 0) + 1
+
+    def drop(self, session_id: str) -> bool:
+        """Remove a session; callers must hold the lock."""
+        self.last_seen.pop(session_id, None)
+        self.versions.pop(session_id, None)
+        for key in [key for key in self.slice_cache if key[0] == session_id]:
+            del self.slice_cache[key]
+        return self.sessions.pop(session_id, None) is not None
+
+
+class SimpleMemory:
+    """Simple conversation memory that stores messages per session.
+
+    Each session is a bounded deque: appends are O(1) and the oldest
+    messages are evicted automatically, so per-session memory stays capped
+    regardless of conversation length. Sessions idle longer than the TTL
+    are dropped, and a max-sessions cap bounds total memory regardless of
+    how many distinct session ids traffic produces.
+
+    Sessions are sharded across lock stripes by session-id hash, so
+    concurrent appends within one session are atomic while sessions on
+    different stripes never contend on a shared lock.
+    """
+
+    def __init__(self, max_messages: int = 32, max_sessions: int = 1024, session_ttl_seconds: float = 3600):
+        """Initialize memory storage with per-session and global bounds."""
+        self.max_messages = max_messages
+        self.session_ttl_seconds = session_ttl_seconds
+        # The cap is enforced per stripe; hashing spreads sessions evenly,
+        # so the global total stays within max_sessions
+        self._max_sessions_per_stripe = max(1, max_sessions // STRIPE_COUNT)
+        self._stripes = [_Stripe() for _ in range(STRIPE_COUNT)]
+        # Instance-bound message classes: one attribute load per append
+        # instead of a module-global lookup in the hot add path
+        self._Human = HumanMessage
+        self._AI = AIMessage
         logger.info("Memory service initialized")
 
+    def _bucket(self, session_id: str) -> _Stripe:
+        """Return the stripe that owns a session id."""
+        return self._stripes[hash(session_id) & (STRIPE_COUNT - 1)]
+
+    def _session(self, stripe: _Stripe, session_id: str, now: float) -> Deque[Msg]:
+        """Get or create a session deque and refresh its activity timestamp.
+
+        Also evicts expired and excess sessions on the stripe; callers must
+        hold the stripe lock.
+        """
+        for sid, seen in list(stripe.last_seen.items()):
+            if sid != session_id and now - seen >= self.session_ttl_seconds:
+                stripe.drop(sid)
+        messages = stripe.sessions.get(session_id)
+        if messages is None:
+            while len(stripe.sessions) >= self._max_sessions_per_stripe:
+                stripe.drop(min(stripe.last_seen, key=stripe.last_seen.get))
+            messages = stripe.sessions[session_id] = deque(maxlen=self.max_messages)
+        stripe.last_seen[session_id] = now
+        return messages
+
     def add_user_message(self, session_id: str, content: str):
         """Add a user message to memory for a session."""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
-        self.sessions[session_id].append(HumanMessage(content=content))
+        stripe = self._bucket(session_id)
+        with stripe.lock:
+            self._session(stripe, session_id, time.monotonic()).append(Msg("human", content))
+            stripe.bump(session_id)
         logger.debug(f"Added user message to session {session_id}")
 
     def add_ai_message(self, session_id: str, content: str):
         """Add an AI message to memory for a session."""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
-        self.sessions[session_id].append(AIMessage(content=content))
+        stripe = self._bucket(session_id)
+        with stripe.lock:
+            self._session(stripe, session_id, time.monotonic()).append(Msg("ai", content))
+            stripe.bump(session_id)
         logger.debug(f"Added AI message to session {session_id}")
 
+    def add_messages(self, session_id: str, messages: Iterable[BaseMessage]):
+        """Add a batch of messages to a session under one lock acquisition.
+
+        Useful when a chat turn produces several messages at once (e.g.
+        tool observations alongside the user/assistant pair).
+        """
+        records = [Msg("human" if isinstance(message, HumanMessage) else "ai", message.content) for message in messages]
+        stripe = self._bucket(session_id)
+        with stripe.lock:
+            self._session(stripe, session_id, time.monotonic()).extend(records)
+            stripe.bump(session_id)
+        logger.debug(f"Added message batch to session {session_id}")
+
     def get_messages(self, session_id: str, last_n: Optional[int] = None) -> List[BaseMessage]:
-        """Get messages for a session, optionally limited to last N."""
-        messages = self.sessions.get(session_id, [])
-        if last_n:
-            return messages[-last_n:]
-        return messages
+        """Get messages for a session, optionally limited to last N.
+
+        Reads do not refresh the session TTL; a session idle past the TTL
+        reads back empty even before a write sweeps it out.
+        """
+        stripe = self._bucket(session_id)
+        with stripe.lock:
+            records = stripe.sessions.get(session_id)
+            if records is None:
+                return []
+            if time.monotonic() - stripe.last_seen[session_id] >= self.session_ttl_seconds:
+                stripe.drop(session_id)
+                return []
+            # Serve repeated identical reads between writes from the memo
+            key = (session_id, last_n)
+            version = stripe.versions.get(session_id, 0)
+            cached = stripe.slice_cache.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            if last_n:
+                records = islice(records, max(0, len(records) - last_n), None)
+            result = [self._to_langchain(record) for record in records]
+            stripe.slice_cache[key] = (version, result)
+            return result
+
+    def _to_langchain(self, record: Msg) -> BaseMessage:
+        """Convert an internal record to the LangChain message consumers expect."""
+        cls = self._Human if record.role == "human" else self._AI
+        return cls(content=record.content)
+
+    def session_count(self) -> int:
+        """Return the number of live sessions across all stripes."""
+        return sum(len(stripe.sessions) for stripe in self._stripes)
 
     def clear_session(self, session_id: str):
         """Clear all messages for a specific session."""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        stripe = self._bucket(session_id)
+        with stripe.lock:
+            removed = stripe.drop(session_id)
+        if removed:
             logger.info(f"Cleared session {session_id}")
 
     def clear_all(self):
         """Clear all sessions."""
-        self.sessions.clear()
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.sessions.clear()
+                stripe.last_seen.clear()
+                stripe.versions.clear()
+                stripe.slice_cache.clear()
         logger.info("Cleared all sessions")
-
@@ -2,8 +2,13 @@
 RAG (Retrieval Augmented Generation) service for document processing
 """
 
+import atexit
+import importlib.util
 import logging
+import threading
 import uuid
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Optional
 
@@ -13,11 +18,54 @@ from langchain_core.documents import Document
 from langchain_core.tools import Tool
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-from app.config import settings
-from app.services.embeddings_service import embeddings_service
+from app.config import get_settings
+from app.services.embeddings_service import get_embeddings_service
+
+settings = get_settings()
 
 logger = logging.getLogger(__name__)
 
+# Number of chunks embedded per encoder call; matches the encode batch size
+# configured on the embeddings service
+EMBED_BATCH_SIZE = 64
+
+# Maximum number of cached retriever-tool results
+RETRIEVAL_CACHE_SIZE = 512
+
+# Seconds to wait after an ingestion before flushing the vectorstore to
+# disk; ingestions arriving within the window share a single fsync
+PERSIST_DEBOUNCE_SECONDS = 2.0
+
+# PyMuPDF extracts text in C and is several times faster than pypdf on
+# large documents; fall back to PyPDFLoader when it is not installed
+_HAS_PYMUPDF = importlib.util.find_spec("fitz") is not None
+
+
+def _load_pdf(pdf_path: str) -> List[Document]:
+    """Extract a PDF into one Document per page."""
+    if _HAS_PYMUPDF:
+        import fitz
+
+        with fitz.open(pdf_path) as pdf:
+            return [
+                Document(page_content=page.get_text("text"), metadata={"source": pdf_path, "page": i})
+                for i, page in enumerate(pdf)
+            ]
+    return PyPDFLoader(pdf_path).load()
+
+# HNSW tuning forwarded to Chroma's underlying collection: a denser graph
+# (M) built with a wider candidate list (construction_ef) costs a little
+# at ingestion time but makes k-NN queries faster and more accurate;
+# search_ef bounds the per-query candidate list. The embeddings service
+# L2-normalizes at encode time, so inner product is equivalent to cosine
+# while skipping the per-candidate norm and divide.
+COLLECTION_METADATA = {
+    "hnsw:space": "ip",
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64,
+}
+
 
 class RAGService:
     """Service for RAG operations with persistent storage."""
@@ -28,27 +76,53 @@ class RAGService:
         self.vectorstore = None
         self.current_document_path = None
         self.document_metadata = {}
+        # Retrieval cache keyed by (corpus version, normalized query); the
+        # version is bumped on every ingestion so stale hits are impossible
+        self._retrieval_cache = OrderedDict()
+        self._corpus_version = 0
+        # One splitter reused across ingestions; construction re-parses the
+        # separator config, so avoid repeating it per document
+        self._splitter = RecursiveCharacterTextSplitter(
+            chunk_size=settings.CHUNK_SIZE,
+            chunk_overlap=settings.CHUNK_OVERLAP,
+            length_function=len,
+            separators=["\n\n", "\n", " ", ""],
+        )
+        # Debounced persistence state; the atexit hook guarantees pending
+        # writes reach disk on a clean shutdown
+        self._persist_lock = threading.Lock()
+        self._persist_timer: Optional[threading.Timer] = None
+        atexit.register(self._flush_persist)
         self.persist_directory = Path("chroma_db")
         self.persist_directory.mkdir(exist_ok=True)
         self._load_or_create_vectorstore()
 
     def _load_or_create_vectorstore(self):
         """Load existing vectorstore or create new one."""
-        try:
-            # Try to load existing vectorstore
-            if (self.persist_directory / "chroma.sqlite3").exists():
-                logger.info("Loading existing vectorstore from database")
+        if (self.persist_directory / "chroma.sqlite3").exists():
+            logger.info("Loading existing vectorstore from database")
+            try:
                 self.vectorstore = Chroma(
-                    persist_directory=str(self.persist_directory), embedding_function=embeddings_service.get_embeddings()
+                    persist_directory=str(self.persist_directory),
+                    embedding_function=get_embeddings_service().get_embeddings(),
+                    collection_metadata=COLLECTION_METADATA,
                 )
+                count = self.vectorstore._collection.count()
+            except Exception as e:
+                # A transient load failure (e.g. a locked SQLite file) must
+                # not trigger a full re-embed of the corpus; leave RAG
+                # unavailable and let a later upload rebuild the store.
+                logger.warning(f"Could not load existing vectorstore: {e}")
+                self.vectorstore = None
+                return
+            if count > 0:
                 self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": settings.RETRIEVER_K})
-                logger.info("Vectorstore loaded successfully")
-            else:
-                # Load initial document if specified
-                self._load_document(settings.PDF_PATH)
-        except Exception as e:
-            logger.warning(f"Could not load existing vectorstore: {e}")
-            self._load_document(settings.PDF_PATH)
+                logger.info(f"Vectorstore loaded with {count} vectors")
+                return
+            # Store exists but holds no vectors; fall through to ingestion
+
+        # Load initial document if specified
+        self._load_document(settings.PDF_PATH)
 
     def _load_document(self, pdf_path: Optional[str] = None):
         """Load PDF document and add to vector store."""
@@ -61,8 +135,7 @@ class RAGService:
 
         try:
             logger.info(f"Loading PDF: {pdf_path}")
-            loader = PyPDFLoader(pdf_path)
-            docs = loader.load()
+            docs = _load_pdf(pdf_path)
             logger.info(f"Loaded {len(docs)} pages")
 
             self._process_and_store_documents(docs, pdf_path)
@@ -74,14 +147,7 @@ class RAGService:
         """Process documents and store in vector database."""
         try:
             # Split documents
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=settings.CHUNK_SIZE,
-                chunk_overlap=settings.CHUNK_OVERLAP,
-                length_function=len,
-                separators=["\n\n", "\n", " ", ""],
-            )
-
-            splits = text_splitter.split_documents(docs)
+            splits = self._splitter.split_documents(docs)
             logger.info(f"Split into {len(splits)} chunks")
 
             # Add metadata to chunks
@@ -89,17 +155,26 @@ class RAGService:
                 if "source" not in split.metadata:
                     split.metadata["source"] = source
 
-            # Create or add to vector store
-            if self.vectorstore is None:
-                self.vectorstore = Chroma.from_documents(
-                    documents=splits,
-                    embedding=embeddings_service.get_embeddings(),
-                    persist_directory=str(self.persist_directory),
-                )
-            else:
-                # Add to existing vectorstore
-                self.vectorstore.add_documents(splits)
-                self.vectorstore.persist()
+            # Create or add to vector store, inserting in batches so the
+            # encoder embeds along its true batch axis instead of per chunk
+            embeddings = get_embeddings_service().get_embeddings()
+            store_existed = self.vectorstore is not None
+            for start in range(0, len(splits), EMBED_BATCH_SIZE):
+                batch = splits[start : start + EMBED_BATCH_SIZE]
+                texts = [split.page_content for split in batch]
+                metadatas = [split.metadata for split in batch]
+                if self.vectorstore is None:
+                    self.vectorstore = Chroma.from_texts(
+                        texts=texts,
+                        embedding=embeddings,
+                        metadatas=metadatas,
+                        persist_directory=str(self.persist_directory),
+                        collection_metadata=COLLECTION_METADATA,
+                    )
+                else:
+                    self.vectorstore.add_texts(texts, metadatas=metadatas)
+            if store_existed:
+                self._schedule_persist()
 
             # Create/update retriever
             self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": settings.RETRIEVER_K})
@@ -107,17 +182,41 @@ class RAGService:
             self.current_document_path = source
             self.document_metadata = {"pages": len(docs), "chunks": len(splits), "path": source}
 
+            # Invalidate cached retrievals against the previous corpus
+            self._corpus_version += 1
+
             logger.info(f"Documents stored in database with {len(splits)} chunks")
 
         except Exception as e:
             logger.error(f"Failed to process documents: {e}")
             raise
 
+    def _schedule_persist(self):
+        """Schedule a debounced vectorstore flush, extending any pending one."""
+        with self._persist_lock:
+            if self._persist_timer is not None:
+                self._persist_timer.cancel()
+            self._persist_timer = threading.Timer(PERSIST_DEBOUNCE_SECONDS, self._flush_persist)
+            self._persist_timer.daemon = True
+            self._persist_timer.start()
+
+    def _flush_persist(self):
+        """Flush pending vectorstore writes to disk."""
+        with self._persist_lock:
+            if self._persist_timer is not None:
+                self._persist_timer.cancel()
+                self._persist_timer = None
+            if self.vectorstore is None:
+                return
+            try:
+                self.vectorstore.persist()
+            except Exception as e:
+                logger.error(f"Vectorstore persist failed: {e}")
+
     def load_document_from_path(self, pdf_path: str) -> dict:
         """Load a document from a file path and return metadata."""
         try:
-            loader = PyPDFLoader(pdf_path)
-            docs = loader.load()
+            docs = _load_pdf(pdf_path)
             logger.info(f"Loaded {len(docs)} pages from {pdf_path}")
 
             self._process_and_store_documents(docs, pdf_path)
@@ -185,18 +284,36 @@ class RAGService:
 
         def search_document_func(query: str) -> str:
             """Search the uploaded PDF document for relevant information."""
+            cache_key = (self._corpus_version, query.strip().lower())
+            cached = self._retrieval_cache.get(cache_key)
+            if cached is not None:
+                self._retrieval_cache.move_to_end(cache_key)
+                return cached
+
             try:
                 docs = self._retrieve_documents(query)
                 if not docs:
-                    return "No relevant information found in the document."
-
-                # Combine all retrieved chunks
-                result = "\n\n".join([f"Excerpt {i+1}:\n{doc.page_content}" for i, doc in enumerate(docs)])
-                return result
+                    result = "No relevant information found in the document."
+                else:
+                    # Combine all retrieved chunks; appending the headers and
+                    # page contents separately lets the final join copy each
+                    # chunk once instead of via an intermediate f-string
+                    parts = []
+                    for i, doc in enumerate(docs, 1):
+                        if parts:
+                            parts.append("\n\n")
+                        parts.append(f"Excerpt {i}:\n")
+                        parts.append(doc.page_content)
+                    result = "".join(parts)
             except Exception as e:
                 logger.error(f"Document search failed: {e}")
                 return f"Error searching document: {str(e)}"
 
+            self._retrieval_cache[cache_key] = result
+            while len(self._retrieval_cache) > RETRIEVAL_CACHE_SIZE:
+                self._retrieval_cache.popitem(last=False)
+            return result
+
         return Tool(
             name="search_document",
             func=search_document_func,
@@ -228,7 +345,7 @@ class RAGService:
             docs = self._retrieve_documents(search_query)
 
             # Use LLM to generate summary
-            context = "\n\n".join([doc.page_content for doc in docs])
+            context = "\n\n".join(doc.page_content for doc in docs)
 
             prompt = f"""Based on the following document excerpts, provide a concise summary 
             of the main topics and key concepts:
@@ -255,13 +372,14 @@ class RAGService:
             if not docs:
                 return "I couldn't find relevant information in the uploaded documents. Please try rephrasing your question or upload relevant documents."
 
-            # Combine context
-            context = "\n\n".join(
-                [
-                    f"Excerpt {i+1} (from {doc.metadata.get('source', 'document')}):\n{doc.page_content}"
-                    for i, doc in enumerate(docs)
-                ]
-            )
+            # Combine context without routing each chunk through an f-string
+            parts = []
+            for i, doc in enumerate(docs, 1):
+                if parts:
+                    parts.append("\n\n")
+                parts.append(f"Excerpt {i} (from {doc.metadata.get('source', 'document')}):\n")
+                parts.append(doc.page_content)
+            context = "".join(parts)
 
             # Create teaching prompt
             if teaching_mode:
@@ -293,5 +411,7 @@ Answer:"""
             return f"Error processing query: {str(e)}"
 
 
-# Global RAG service instance
-rag_service = RAGService()
+@lru_cache(maxsize=1)
+def get_rag_service() -> RAGService:
+    """Return the shared RAG service, creating it on first use."""
+    return RAGService()
@@ -3,11 +3,14 @@ Web search service using DuckDuckGo
 """
 
 import logging
+from functools import lru_cache
 
 from langchain_community.tools import DuckDuckGoSearchResults
 from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
 
-from app.config import settings
+from app.config import get_settings
+
+settings = get_settings()
 
 logger = logging.getLogger(__name__)
 
@@ -37,11 +40,28 @@ class SearchService:
             logger.error(f"Search failed: {e}")
             return f"Error performing search: {str(e)}"
 
+    async def asearch(self, query: str) -> str:
+        """Perform web search without blocking the event loop.
+
+        Async handlers should prefer this over search() so the loop is
+        released for the duration of the DuckDuckGo round trip.
+        """
+        if self.search_tool is None:
+            return "Web search is not available. Please check the search service configuration."
+        try:
+            result = await self.search_tool.ainvoke(query)
+            return result
+        except Exception as e:
+            logger.error(f"Search failed: {e}")
+            return f"Error performing search: {str(e)}"
+
     def get_tool(self):
         """Get the search tool."""
         return self.search_tool
 
 
-# Global search service instance
-search_service = SearchService()
+@lru_cache(maxsize=1)
+def get_search_service() -> SearchService:
+    """Return the shared search service, creating it on first use."""
+    return SearchService()
 
@@ -3,6 +3,8 @@ File utility functions
 """
 
 import logging
+import os
+import stat
 from pathlib import Path
 from typing import Optional
 
@@ -23,17 +25,17 @@ def validate_pdf_file(file_path: Path) -> bool:
         if not file_path.suffix.lower() == ".pdf":
             return False
 
-        # Check if file exists and is readable
-        if not file_path.exists() or not file_path.is_file():
-            return False
-
-        # Basic PDF validation - check magic bytes
-        with open(file_path, "rb") as f:
-            header = f.read(4)
-            if header != b"%PDF":
+        # Single open covers the existence, regular-file and magic-byte
+        # checks, avoiding the extra stat calls of exists()/is_file()
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            if not stat.S_ISREG(os.fstat(fd).st_mode):
                 return False
-
-        return True
+            return os.pread(fd, 4, 0) == b"%PDF"
+        finally:
+            os.close(fd)
+    except OSError:
+        return False
     except Exception as e:
         logger.error(f"Error validating PDF: {e}")
         return False
@@ -3,11 +3,13 @@ Simple script to run the FastAPI application
 """
 import os
 import uvicorn
-from app.config import settings
+from app.config import get_settings
+
+settings = get_settings()
 
 if __name__ == "__main__":
-    # Use PORT from environment (for Render, Heroku, etc.) or default
-    port = int(os.getenv("PORT", settings.PORT))
+    # PORT is an env-sourced settings field (Render, Heroku, etc. set it)
+    port = settings.PORT
     # Always use 0.0.0.0 for production (Render requirement)
     host = os.getenv("HOST", "0.0.0.0")
     
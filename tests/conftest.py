@@ -0,0 +1,26 @@
+"""
+Shared pytest fixtures
+"""
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Keep /health from booting the agent/vector-store stack during tests
+os.environ.setdefault("SKIP_RAG_PROBE", "1")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _preload_app():
+    """Import app.main once per session so its heavy import graph is paid
+    a single time per worker instead of at each module's collection."""
+    import app.main
+
+    return app.main.app
+
+
+@pytest.fixture(scope="session")
+def client(_preload_app):
+    """Session-scoped TestClient so app startup runs once for the suite."""
+    with TestClient(_preload_app) as test_client:
+        yield test_client
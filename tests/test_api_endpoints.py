@@ -2,25 +2,21 @@
 Tests for API endpoints
 """
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
 
-client = TestClient(app)
 
-
-def test_api_docs():
+def test_api_docs(client):
     """Test that API documentation is accessible."""
     response = client.get("/docs")
     assert response.status_code == 200
 
 
-def test_api_redoc():
+def test_api_redoc(client):
     """Test that ReDoc documentation is accessible."""
     response = client.get("/redoc")
     assert response.status_code == 200
 
 
-def test_openapi_json():
+def test_openapi_json(client):
     """Test that OpenAPI schema is accessible."""
     response = client.get("/openapi.json")
     assert response.status_code == 200
@@ -28,19 +24,19 @@ def test_openapi_json():
     assert "info" in response.json()
 
 
-def test_chat_endpoint_missing_message():
+def test_chat_endpoint_missing_message(client):
     """Test chat endpoint with missing message."""
     response = client.post("/chat", json={})
     assert response.status_code == 422  # Validation error
 
 
-def test_chat_endpoint_invalid_json():
+def test_chat_endpoint_invalid_json(client):
     """Test chat endpoint with invalid JSON."""
     response = client.post("/chat", json={"invalid": "data"})
     assert response.status_code == 422  # Validation error
 
 
-def test_document_info_no_document():
+def test_document_info_no_document(client):
     """Test document info endpoint when no document is loaded."""
     response = client.get("/document/info")
     assert response.status_code == 200
@@ -48,11 +44,10 @@ def test_document_info_no_document():
     assert "available" in data
 
 
-def test_learn_endpoint_missing_fields():
+def test_learn_endpoint_missing_fields(client):
     """Test learn endpoint with missing required fields."""
     # Learn endpoint might accept empty body or have defaults
     # Test with minimal invalid data
     response = client.post("/learn", json={"mode": "invalid_mode"})
     # Should return 422 for invalid mode, or 200 if it handles gracefully
     assert response.status_code in [200, 422]
-
@@ -2,35 +2,41 @@
 Tests for configuration management
 """
 import pytest
-import os
-from app.config import Settings
-
-
-def test_settings_loads_from_env(monkeypatch):
-    """Test that settings load from environment variables."""
-    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key-123")
-    settings = Settings()
-    assert settings.OPENROUTER_API_KEY == "test-key-123"
-    assert settings.OPENROUTER_MODEL == "openai/gpt-4.1-nano"
-
-
-def test_settings_defaults():
-    """Test that settings have correct defaults."""
-    os.environ["OPENROUTER_API_KEY"] = "test-key"
-    settings = Settings()
-    assert settings.API_VERSION == "1.0.0"
-    assert settings.CHUNK_SIZE == 1000
-    assert settings.RETRIEVER_K == 4
-    assert settings.LOG_LEVEL == "INFO"
-
-
-def test_port_property():
-    """Test port property reads from environment."""
-    os.environ["OPENROUTER_API_KEY"] = "test-key"
-    os.environ["PORT"] = "9000"
-    settings = Settings()
-    assert settings.port == 9000
-    del os.environ["PORT"]
-
-
-
+from app.config import get_settings
+
+
+@pytest.fixture(autouse=True)
+def _reset_settings_cache():
+    """Clear the cached Settings so each test sees its own environment."""
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+@pytest.mark.parametrize(
+    "env,attr,expected",
+    [
+        # Values loaded from the environment
+        ({"OPENROUTER_API_KEY": "test-key-123"}, "OPENROUTER_API_KEY", "test-key-123"),
+        ({"PORT": "9000"}, "PORT", 9000),
+        ({"PORT": "9000"}, "port", 9000),
+        # Defaults
+        ({}, "OPENROUTER_MODEL", "openai/gpt-4.1-nano"),
+        ({}, "API_VERSION", "1.0.0"),
+        ({}, "CHUNK_SIZE", 1000),
+        ({}, "RETRIEVER_K", 4),
+        ({}, "LOG_LEVEL", "INFO"),
+    ],
+)
+def test_settings_values(monkeypatch, env, attr, expected):
+    """Test environment-derived and default settings values."""
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    assert getattr(get_settings(), attr) == expected
+
+
+def test_settings_cached(monkeypatch):
+    """Test that repeated get_settings calls reuse one instance."""
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    assert get_settings() is get_settings()
@@ -2,13 +2,9 @@
 Basic health check tests
 """
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
 
-client = TestClient(app)
 
-
-def test_root():
+def test_root(client):
     """Test root endpoint."""
     response = client.get("/")
     assert response.status_code == 200
@@ -22,7 +18,7 @@ def test_root():
         assert "text/html" in response.headers.get("content-type", "")
 
 
-def test_health():
+def test_health(client):
     """Test health endpoint."""
     response = client.get("/health")
     assert response.status_code == 200
@@ -30,5 +26,3 @@ def test_health():
     assert data["status"] == "healthy"
     assert "version" in data
     assert "rag_available" in data
-
-
@@ -3,6 +3,9 @@ Tests for service classes
 """
 import pytest
 import os
+import time
+from langchain_core.messages import HumanMessage
+
 from app.services.memory import SimpleMemory
 
 
@@ -46,12 +49,45 @@ def test_memory_multiple_sessions():
 def test_memory_get_last_n():
     """Test getting last N messages."""
     memory = SimpleMemory()
-    for i in range(5):
-        memory.add_user_message("session1", f"Message {i}")
-    
+    memory.add_messages("session1", [HumanMessage(content=f"Message {i}") for i in range(5)])
+
     messages = memory.get_messages("session1", last_n=3)
     assert len(messages) == 3
     assert messages[0].content == "Message 2"
     assert messages[2].content == "Message 4"
 
 
+def test_memory_get_last_n_cached():
+    """Test that identical reads between writes reuse the cached slice."""
+    memory = SimpleMemory()
+    memory.add_user_message("session1", "Hello")
+
+    first = memory.get_messages("session1", last_n=1)
+    assert memory.get_messages("session1", last_n=1) is first
+
+    memory.add_user_message("session1", "Again")
+    refreshed = memory.get_messages("session1", last_n=1)
+    assert refreshed is not first
+    assert refreshed[0].content == "Again"
+
+
+def test_memory_session_ttl_eviction():
+    """Test that idle sessions expire after the TTL."""
+    memory = SimpleMemory(session_ttl_seconds=0.05)
+    memory.add_user_message("session1", "Hello")
+    assert len(memory.get_messages("session1")) == 1
+
+    time.sleep(0.1)
+    assert memory.get_messages("session1") == []
+    assert memory.session_count() == 0
+
+
+def test_memory_max_sessions_cap():
+    """Test that total live sessions stay within the configured cap."""
+    memory = SimpleMemory(max_sessions=16)
+    for i in range(100):
+        memory.add_user_message(f"session{i}", "Hello")
+
+    assert memory.session_count() <= 16
+
+